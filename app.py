@@ -1,9 +1,13 @@
 import time
 import logging
-from typing import Dict, Any, List
+import threading
+from typing import Dict, Any
 
+import orjson
 import requests
 from flask import Flask, jsonify
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # -----------------------------------------------------------------------------
 # Configuração básica do Flask
@@ -24,9 +28,31 @@ GITHUB_LOTOFACIL_URL = (
     "guilhermeasn/loteria.json/master/data/lotofacil.json"
 )
 
-# Cache simples em memória
+# Sessão HTTP única (reaproveita conexões TCP/TLS entre as requisições)
+SESSION = requests.Session()
+SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=20,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[500, 502, 503, 504],
+        ),
+    ),
+)
+
+# Cache em memória (stale-while-revalidate)
+# O último resultado é mantido indefinidamente; depois do TTL ele continua
+# sendo servido enquanto uma revalidação condicional (ETag) roda em segundo
+# plano, o que custa uma única requisição (normalmente um 304).
 _last_result_cache: Dict[str, Any] = {}
-CACHE_TTL_SECONDS = 60  # 1 minuto
+_cache_lock = threading.Lock()
+_refresh_done = threading.Event()  # sinalizado quando não há busca em andamento
+_refresh_done.set()
+REFRESH_WAIT_SECONDS = 15
+CACHE_TTL_SECONDS = 60  # 1 minuto entre revalidações
 
 
 # -----------------------------------------------------------------------------
@@ -43,53 +69,117 @@ def fetch_lotofacil_from_github() -> Dict[str, Any]:
           "3550": [...],
           ...
         }
+
+    Envia o ETag da última resposta em If-None-Match; se o arquivo não
+    mudou (304), devolve o resultado já processado sem baixar nem reler o JSON.
     """
+    headers = {}
+    etag = _last_result_cache.get("etag")
+    if etag and "parsed" in _last_result_cache:
+        headers["If-None-Match"] = etag
+
     logging.info(f"[GITHUB] Buscando JSON em {GITHUB_LOTOFACIL_URL}")
-    resp = requests.get(GITHUB_LOTOFACIL_URL, timeout=10)
+    resp = SESSION.get(GITHUB_LOTOFACIL_URL, headers=headers, timeout=10)
     logging.info(f"[GITHUB] Status code: {resp.status_code}")
+
+    if resp.status_code == 304:
+        logging.info("[GITHUB] JSON não mudou (304). Reaproveitando resultado.")
+        return _last_result_cache["parsed"]
+
     resp.raise_for_status()
 
-    data = resp.json()
+    data = orjson.loads(resp.content)
 
     if not isinstance(data, dict) or not data:
         raise RuntimeError("JSON da loteria.json veio vazio ou em formato inesperado.")
 
     # Pega o maior número de concurso (último sorteio)
-    concursos_numericos: List[int] = [int(k) for k in data.keys()]
-    ultimo_concurso = max(concursos_numericos)
+    ultimo_concurso = max(map(int, data.keys()))
 
     dezenas_raw = data[str(ultimo_concurso)]  # lista de ints ou strings
     dezenas = [f"{int(d):02d}" for d in dezenas_raw]  # normaliza para "01", "02", ...
 
-    return {
+    result = {
         "source": "github-loteria.json",
         "concurso": ultimo_concurso,
         "dezenas": dezenas,
         "raw": {str(ultimo_concurso): dezenas_raw},
     }
 
+    _last_result_cache["etag"] = resp.headers.get("ETag")
+    _last_result_cache["parsed"] = result
+    return result
+
 
 # -----------------------------------------------------------------------------
 # Função com cache em memória
 # -----------------------------------------------------------------------------
-def get_lotofacil_result() -> Dict[str, Any]:
-    now = time.time()
+def _refresh_cache() -> Dict[str, Any]:
+    """Busca no GitHub e grava no cache. Sempre libera a flag 'refreshing'."""
+    try:
+        result = fetch_lotofacil_from_github()
+        with _cache_lock:
+            _last_result_cache["data"] = result
+            _last_result_cache["timestamp"] = time.time()
+        return result
+    finally:
+        with _cache_lock:
+            _last_result_cache["refreshing"] = False
+            _refresh_done.set()
+
+
+def _begin_refresh() -> bool:
+    """
+    Marca o início de uma busca (chamar com _cache_lock adquirido).
+    Retorna False se outra thread já está buscando (single-flight).
+    """
+    if _last_result_cache.get("refreshing"):
+        return False
+    _last_result_cache["refreshing"] = True
+    _refresh_done.clear()
+    return True
 
-    # Se tem cache recente, usa ele
-    if (
-        _last_result_cache
-        and (now - _last_result_cache.get("timestamp", 0)) < CACHE_TTL_SECONDS
-    ):
-        logging.info("Retornando resultado do cache.")
-        return _last_result_cache["data"]
 
-    # Senão, busca de novo no GitHub
-    logging.info("Cache vazio/expirado. Buscando novo resultado no GitHub...")
-    result = fetch_lotofacil_from_github()
+def _refresh_cache_background() -> None:
+    try:
+        _refresh_cache()
+    except Exception:
+        logging.exception("Falha ao atualizar o cache em segundo plano.")
 
-    _last_result_cache["data"] = result
-    _last_result_cache["timestamp"] = now
-    return result
+
+def get_lotofacil_result() -> Dict[str, Any]:
+    now = time.time()
+
+    with _cache_lock:
+        data = _last_result_cache.get("data")
+        age = now - _last_result_cache.get("timestamp", 0)
+
+        # Se tem cache recente, usa ele
+        if data is not None and age < CACHE_TTL_SECONDS:
+            logging.info("Retornando resultado do cache.")
+            return data
+
+        # Cache velho: devolve já e revalida em segundo plano
+        if data is not None:
+            if _begin_refresh():
+                threading.Thread(target=_refresh_cache_background, daemon=True).start()
+            logging.info("Retornando resultado do cache (velho, atualizando).")
+            return data
+
+        is_owner = _begin_refresh()
+
+    # Cache vazio: só uma thread busca, as demais esperam
+    if is_owner:
+        logging.info("Cache vazio. Buscando novo resultado no GitHub...")
+        return _refresh_cache()
+
+    logging.info("Busca já em andamento. Aguardando resultado...")
+    _refresh_done.wait(timeout=REFRESH_WAIT_SECONDS)
+    with _cache_lock:
+        data = _last_result_cache.get("data")
+    if data is None:
+        raise RuntimeError("Não foi possível obter o resultado da Lotofácil.")
+    return data
 
 
 # -----------------------------------------------------------------------------
@@ -0,0 +1,16 @@
+# -----------------------------------------------------------------------------
+# Configuração do Gunicorn (produção)
+# Uso: gunicorn app:app
+# -----------------------------------------------------------------------------
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# Workers com threads: as chamadas ao GitHub são de I/O e liberam o GIL,
+# então várias requisições são atendidas em paralelo no mesmo worker.
+worker_class = "gthread"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+
+keepalive = 30
+timeout = 30